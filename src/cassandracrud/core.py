@@ -1,7 +1,10 @@
 import traceback
-from cassandra.cluster import Cluster, ExecutionProfile, ConsistencyLevel, ResultSet
-from cassandra.policies import WhiteListRoundRobinPolicy, RetryPolicy
-from cassandra.query import SimpleStatement
+from collections import defaultdict
+from operator import itemgetter
+from cassandra.cluster import Cluster, ExecutionProfile, ConsistencyLevel, ResultSet, EXEC_PROFILE_DEFAULT
+from cassandra.concurrent import execute_concurrent, execute_concurrent_with_args
+from cassandra.policies import TokenAwarePolicy, DCAwareRoundRobinPolicy, RetryPolicy, HostDistance
+from cassandra.query import SimpleStatement, BatchStatement, BatchType, tuple_factory
 from cassandra.auth import PlainTextAuthProvider
 import pandas as pd
 import time
@@ -9,7 +12,9 @@ import os
 from datetime import datetime
 
 def pandas_factory(colnames, rows):
-    return pd.DataFrame(rows, columns=colnames)
+    # Opt-in only: row factories run on the driver's event loop thread, so
+    # this builds every page's DataFrame there and stalls other requests
+    return pd.DataFrame.from_records(rows, columns=colnames)
 
 class CassandraCRUD:
     def __init__(self, 
@@ -18,28 +23,45 @@ class CassandraCRUD:
                  username=None,
                  password=None,
                  pool_size=50,
+                 connections_per_host=None,
                  consistency_level=ConsistencyLevel.LOCAL_QUORUM,
                  serial_consistency_level=ConsistencyLevel.LOCAL_SERIAL,
                  request_timeout=15,
                  load_balancing_policy=None,
+                 local_dc=None,
                  retry_policy=None,
                  protocol_version=5,
-                 row_factory=pandas_factory):
+                 refresh_schema_metadata=False,
+                 compression=None,
+                 connection_class=None,
+                 row_factory=tuple_factory):
         self.contact_points = contact_points
         self.keyspace = keyspace
         self.username = username
         self.password = password
         self.pool_size = pool_size
+        self.connections_per_host = connections_per_host
         self.consistency_level = consistency_level
         self.serial_consistency_level = serial_consistency_level
         self.request_timeout = request_timeout
         self.load_balancing_policy = load_balancing_policy
+        self.local_dc = local_dc
         self.retry_policy = retry_policy or RetryPolicy()
         self.protocol_version = protocol_version
+        self.refresh_schema_metadata = refresh_schema_metadata
+        self.compression = compression
+        self.connection_class = connection_class
         self.row_factory = row_factory
+
+        if connections_per_host and protocol_version >= 3:
+            raise ValueError("connections_per_host only applies to protocol_version 1 or 2; "
+                             "protocol v3+ multiplexes requests over one connection per host")
         
         self.session = None
         self.cluster = None
+        self._stmt_cache = {}
+        self._query_cache = {}
+        self._housekeeping_profile = None
 
     def connect(self):
         if not self.contact_points or not self.keyspace:
@@ -47,7 +69,7 @@ class CassandraCRUD:
 
         try:
             execution_profile = ExecutionProfile(
-                load_balancing_policy=self.load_balancing_policy or WhiteListRoundRobinPolicy(self.contact_points),
+                load_balancing_policy=self.load_balancing_policy or TokenAwarePolicy(DCAwareRoundRobinPolicy(local_dc=self.local_dc)),
                 retry_policy=self.retry_policy,
                 consistency_level=self.consistency_level,
                 serial_consistency_level=self.serial_consistency_level,
@@ -58,16 +80,39 @@ class CassandraCRUD:
             
             self.cluster = Cluster(
                 contact_points=self.contact_points,
-                execution_profiles={"default": execution_profile},
+                execution_profiles={EXEC_PROFILE_DEFAULT: execution_profile},
                 protocol_version=self.protocol_version,
                 auth_provider=auth_provider,
+                compression=self._resolve_compression(),
+                connection_class=self.connection_class,
             )
+            # Protocol v3+ multiplexes over a single connection per host
+            if self.protocol_version < 3:
+                max_connections = self.connections_per_host or self.pool_size
+                core_connections = self.connections_per_host or max(1, self.pool_size // 4)
+                self.cluster.set_max_connections_per_host(HostDistance.LOCAL, max_connections)
+                self.cluster.set_core_connections_per_host(HostDistance.LOCAL, core_connections)
             self.session = self.cluster.connect(self.keyspace)
+            # Same timeout, consistency and policies as the configured default,
+            # but plain tuples even when a DataFrame row_factory is opted into
+            self._housekeeping_profile = self.session.execution_profile_clone_update(
+                EXEC_PROFILE_DEFAULT, row_factory=tuple_factory)
+            # Schema is loaded once on connect; tables changed through this
+            # client are refreshed explicitly in create_table/drop_table
+            self.cluster.schema_metadata_enabled = self.refresh_schema_metadata
+            self._stmt_cache = {}
             print(f"Connected to Cassandra keyspace: {self.keyspace}")
         except Exception as e:
             print(f"Connection error: {str(e)}")
             raise
 
+    def _resolve_compression(self):
+        if self.compression is not None:
+            return self.compression
+        # Compressing loopback traffic only costs CPU
+        local = all(str(cp) in ("localhost", "::1") or str(cp).startswith("127.") for cp in self.contact_points)
+        return not local
+
     def _configure_from_environment(self):
         self.contact_points = os.getenv("CASSANDRA_PROD_CONTACT_POINTS", "cassandra.prod.svc.cluster.local").split(",")
         self.keyspace = os.getenv("CASSANDRA_PROD_KEYSPACE", "prod_keyspace")
@@ -77,21 +122,31 @@ class CassandraCRUD:
     def is_connected(self):
         if self.session is not None and self.cluster is not None:
             try:
-                self.session.execute("SELECT now() FROM system.local")
+                self.session.execute("SELECT now() FROM system.local", execution_profile=self._housekeeping_profile)
                 return True
             except Exception as e:
                 print(f"Connection check failed: {str(e)}")
                 return False
         return False
 
-    def execute(self, query, params=None):
+    def execute(self, query, params=None, prepared=False, fetch_size=None):
         if not self.is_connected():
             self.connect()
         try:
-            statement = SimpleStatement(query)
+            if prepared:
+                statement = self._get_prepared(query)
+                if fetch_size is not None:
+                    # Bind so the page size does not leak into the cached statement
+                    statement, params = statement.bind(params or ()), None
+                    statement.fetch_size = fetch_size
+            elif fetch_size is not None:
+                statement = SimpleStatement(query, fetch_size=fetch_size)
+            else:
+                # The driver accepts plain query strings directly
+                statement = query
             result = self.session.execute(statement, params) if params else self.session.execute(statement)
             if isinstance(result, ResultSet):
-                return pd.DataFrame(list(result))
+                return self._to_frame(result)
             else:
                 return result
         except Exception as e:
@@ -99,12 +154,53 @@ class CassandraCRUD:
             print(f"Query: {query}")
             return pd.DataFrame()
 
+    def _to_frame(self, result):
+        future = result.response_future
+        rows = self._page_rows(result)
+        frames = []
+        while True:
+            has_more_pages = future.has_more_pages
+            prefetch = has_more_pages and not isinstance(rows, pd.DataFrame)
+            if prefetch:
+                # Fetch the next page while this one is converted below
+                future.start_fetching_next_page()
+            if not isinstance(rows, pd.DataFrame):
+                rows = pd.DataFrame.from_records(list(rows), columns=result.column_names)
+            frames.append(rows)
+            if not has_more_pages:
+                break
+            if not prefetch:
+                # Pages from a DataFrame row_factory such as pandas_factory
+                # arrive already built, leaving nothing to overlap with
+                future.start_fetching_next_page()
+            rows = self._page_rows(future.result())
+        return frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+
+    def _page_rows(self, result):
+        # ResultSet.current_rows evaluates `self._current_rows or []`, which a
+        # DataFrame page cannot do, so the raw page is read instead. The private
+        # attribute holds the page throughout cassandra-driver 3.x (3.29.1 is
+        # the minimum required here; checked against 3.30)
+        return result._current_rows
+
+    def _execute_write(self, query, params):
+        if not self.is_connected():
+            self.connect()
+        # Binding is stricter than %s formatting (a string is no longer
+        # accepted for a timestamp column, for example); such errors are
+        # raised here instead of being printed and the write dropped
+        statement = self._get_prepared(query).bind(params)
+        try:
+            self.session.execute(statement)
+        except Exception as e:
+            print(f"Query execution error: {str(e)}")
+            print(f"Query: {query}")
+
     def execute_async(self, query, params=None):
         if not self.is_connected():
             self.connect()
         try:
-            statement = SimpleStatement(query)
-            return self.session.execute_async(statement, params)
+            return self.session.execute_async(query, params)
         except Exception as e:
             print(f"Async query execution error: {str(e)}")
             print(f"Query: {query}")
@@ -113,8 +209,16 @@ class CassandraCRUD:
     def prepare(self, query):
         if not self.is_connected():
             self.connect()
+        # A fresh statement: callers may change its options, which must not
+        # leak into the statements cached for CRUD calls
         return self.session.prepare(query)
 
+    def _get_prepared(self, query):
+        prepared = self._stmt_cache.get(query)
+        if prepared is None:
+            prepared = self._stmt_cache[query] = self.session.prepare(query)
+        return prepared
+
     def execute_batch(self, statements):
         if not self.is_connected():
             self.connect()
@@ -141,47 +245,157 @@ class CassandraCRUD:
             print("Cassandra cluster connection closed.")
 
     # CRUD operations
-    def create(self, table, data):
-        columns = ", ".join(data.keys())
-        placeholders = ", ".join(["%s"] * len(data))
-        query = f"INSERT INTO {table} ({columns}) VALUES ({placeholders})"
-        return self.execute(query, list(data.values()))
-
-    def read(self, table, conditions=None):
-        query = f"SELECT * FROM {table}"
+    def create(self, table, data, concurrency=256, same_partition=False, batch_size=100):
+        if isinstance(data, pd.DataFrame):
+            return self.create_many(table, data, concurrency, same_partition, batch_size)
+        query, columns, _ = self._crud_query("INSERT", table, data=data)
+        return self._execute_write(query, [data[k] for k in columns])
+
+    def create_many(self, table, data, concurrency=256, same_partition=False, batch_size=100):
+        prepared = self._prepare_insert(table, data.columns)
+        rows = data.itertuples(index=False, name=None)
+        if same_partition:
+            return self._create_partition_batches(table, data, prepared, rows, concurrency, batch_size)
+        execute_concurrent_with_args(self.session, prepared, rows, concurrency=concurrency)
+
+    def _prepare_insert(self, table, columns):
+        if not self.is_connected():
+            self.connect()
+        placeholders = ", ".join(["?"] * len(columns))
+        return self._get_prepared(f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})")
+
+    def _create_partition_batches(self, table, data, prepared, rows, concurrency, batch_size):
+        # Single-partition unlogged batches are applied on one replica set
+        # without going through the batchlog; a batch spanning partitions
+        # would defeat that, so an unknown partition key is an error
+        key_columns = self._partition_key_columns(table)
+        if not key_columns:
+            raise ValueError(f"Cannot resolve the partition key of table {table}")
+        missing = [name for name in key_columns if name not in data.columns]
+        if missing:
+            raise ValueError(f"Partition key columns missing from data: {', '.join(missing)}")
+        partition_key = itemgetter(*[data.columns.get_loc(name) for name in key_columns])
+        partitions = defaultdict(list)
+        for row in rows:
+            partitions[partition_key(row)].append(row)
+        batches = []
+        for partition_rows in partitions.values():
+            # Large partitions are split to stay under batch_size_fail_threshold
+            for start in range(0, len(partition_rows), batch_size):
+                batch = BatchStatement(batch_type=BatchType.UNLOGGED, consistency_level=self.consistency_level)
+                for row in partition_rows[start:start + batch_size]:
+                    batch.add(prepared, row)
+                batches.append((batch, None))
+        execute_concurrent(self.session, batches, concurrency=concurrency)
+
+    def read(self, table, conditions=None, fetch_size=None):
         if conditions:
-            where_clause = " AND ".join([f"{k} = %s" for k in conditions.keys()])
-            query += f" WHERE {where_clause}"
-            return self.execute(query, list(conditions.values()))
-        return self.execute(query)
+            query, _, keys = self._crud_query("SELECT", table, conditions=conditions)
+            return self.execute(query, self._condition_params(conditions, keys), prepared=True, fetch_size=fetch_size)
+        return self.execute(f"SELECT * FROM {table}", fetch_size=fetch_size)
 
     def update(self, table, data, conditions):
-        set_clause = ", ".join([f"{k} = %s" for k in data.keys()])
-        where_clause = " AND ".join([f"{k} = %s" for k in conditions.keys()])
-        query = f"UPDATE {table} SET {set_clause} WHERE {where_clause}"
-        params = list(data.values()) + list(conditions.values())
-        return self.execute(query, params)
+        query, columns, keys = self._crud_query("UPDATE", table, data=data, conditions=conditions)
+        params = [data[k] for k in columns]
+        params += self._condition_params(conditions, keys)
+        return self._execute_write(query, params)
 
     def delete(self, table, conditions):
-        where_clause = " AND ".join([f"{k} = %s" for k in conditions.keys()])
-        query = f"DELETE FROM {table} WHERE {where_clause}"
-        return self.execute(query, list(conditions.values()))
+        query, _, keys = self._crud_query("DELETE", table, conditions=conditions)
+        return self._execute_write(query, self._condition_params(conditions, keys))
+
+    def _crud_query(self, verb, table, data=None, conditions=None):
+        # The CQL only depends on the column names and on which conditions are
+        # IN lists, so it is built once per shape instead of on every call
+        data = data or {}
+        conditions = conditions or {}
+        in_lists = tuple(isinstance(v, list) for v in conditions.values())
+        shape = (verb, table, tuple(data), tuple(conditions), in_lists)
+        cached = self._query_cache.get(shape)
+        if cached is None:
+            cached = self._query_cache[shape] = self._build_crud_query(verb, table, data, conditions)
+        return cached
+
+    def _build_crud_query(self, verb, table, data, conditions):
+        # Sorted so every key order maps to the same prepared statement;
+        # only lists become an IN marker, so tuples and sets still compare
+        # equal against frozen collection columns
+        columns = sorted(data)
+        keys = sorted((k, isinstance(v, list)) for k, v in conditions.items())
+        where_clause = " AND ".join([f"{k} IN ?" if is_in else f"{k} = ?" for k, is_in in keys])
+        if verb == "INSERT":
+            placeholders = ", ".join(["?"] * len(columns))
+            query = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})"
+        elif verb == "SELECT":
+            query = f"SELECT * FROM {table} WHERE {where_clause}"
+        elif verb == "UPDATE":
+            set_clause = ", ".join([f"{k} = ?" for k in columns])
+            query = f"UPDATE {table} SET {set_clause} WHERE {where_clause}"
+        else:
+            query = f"DELETE FROM {table} WHERE {where_clause}"
+        return query, columns, keys
+
+    def _condition_params(self, conditions, keys):
+        return [list(conditions[k]) if is_in else conditions[k] for k, is_in in keys]
 
     # Additional utility methods
     def table_exists(self, table_name):
-        query = "SELECT table_name FROM system_schema.tables WHERE keyspace_name = %s AND table_name = %s"
-        result = self.execute(query, (self.keyspace, table_name))
-        return len(result) > 0
+        return self._table_metadata(table_name) is not None
 
     def create_table(self, table_name, column_definitions):
         columns = ", ".join([f"{name} {type}" for name, type in column_definitions.items()])
         query = f"CREATE TABLE IF NOT EXISTS {table_name} ({columns})"
-        return self.execute(query)
+        result = self.execute(query)
+        if not self.refresh_schema_metadata:
+            self.refresh_table_metadata(table_name)
+        return result
 
     def drop_table(self, table_name):
         query = f"DROP TABLE IF EXISTS {table_name}"
-        return self.execute(query)
+        result = self.execute(query)
+        if not self.refresh_schema_metadata:
+            self.refresh_table_metadata(table_name)
+        return result
+
+    def refresh_table_metadata(self, table_name):
+        # Needed after ALTER TABLE or any DDL not sent through create_table/
+        # drop_table while schema event refreshes are disabled
+        if self.session is None:
+            self.connect()
+        keyspace, table = self._split_table_name(table_name)
+        try:
+            self.cluster.refresh_table_metadata(keyspace, table)
+            return True
+        except Exception as e:
+            print(f"Schema refresh error: {str(e)}")
+            print(f"Table: {table_name}")
+            return False
 
     def get_table_schema(self, table_name):
-        query = f"SELECT column_name, type FROM system_schema.columns WHERE keyspace_name = %s AND table_name = %s"
-        return self.execute(query, (self.keyspace, table_name))
\ No newline at end of file
+        table = self._table_metadata(table_name)
+        columns = [(c.name, c.cql_type) for c in table.columns.values()] if table is not None else []
+        return pd.DataFrame.from_records(columns, columns=["column_name", "type"])
+
+    def _partition_key_columns(self, table_name):
+        table = self._table_metadata(table_name)
+        return [c.name for c in table.partition_key] if table is not None else []
+
+    def _table_metadata(self, table_name):
+        # Served from the driver's schema cache. With schema events off, a
+        # miss may just mean the table was created elsewhere after connect(),
+        # so refresh once; with events on the cache is already current
+        if self.session is None:
+            self.connect()
+        table = self._cached_table_metadata(table_name)
+        if table is None and not self.refresh_schema_metadata and self.refresh_table_metadata(table_name):
+            table = self._cached_table_metadata(table_name)
+        return table
+
+    def _cached_table_metadata(self, table_name):
+        keyspace, table = self._split_table_name(table_name)
+        keyspace = self.cluster.metadata.keyspaces.get(keyspace)
+        return keyspace.tables.get(table) if keyspace is not None else None
+
+    def _split_table_name(self, table_name):
+        keyspace, _, table = table_name.rpartition(".")
+        return keyspace or self.keyspace, table
\ No newline at end of file
@@ -1,6 +1,11 @@
 import unittest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, PropertyMock
+import pandas as pd
+from cassandra.cluster import ResultSet, EXEC_PROFILE_DEFAULT
+from cassandra.policies import TokenAwarePolicy, HostDistance
+from cassandra.query import BatchType, tuple_factory
 from cassandracrud import CassandraCRUD
+from cassandracrud.core import pandas_factory
 
 class TestCassandraCRUD(unittest.TestCase):
     
@@ -13,11 +18,190 @@ class TestCassandraCRUD(unittest.TestCase):
         self.assertIsNotNone(self.crud.session)
         self.assertIsNotNone(self.crud.cluster)
 
+    @patch('cassandracrud.core.Cluster')
+    def test_default_load_balancing_policy(self, mock_cluster):
+        crud = CassandraCRUD(contact_points=['localhost'], keyspace='test_keyspace', local_dc='dc1')
+        crud.connect()
+        profiles = mock_cluster.call_args.kwargs["execution_profiles"]
+        self.assertEqual(list(profiles), [EXEC_PROFILE_DEFAULT])
+        policy = profiles[EXEC_PROFILE_DEFAULT].load_balancing_policy
+        self.assertIsInstance(policy, TokenAwarePolicy)
+        self.assertEqual(policy._child_policy.local_dc, 'dc1')
+        self.assertIs(profiles[EXEC_PROFILE_DEFAULT].row_factory, tuple_factory)
+
+    @patch('cassandracrud.core.Cluster')
+    def test_connection_pool_sizing(self, mock_cluster):
+        with self.assertRaises(ValueError):
+            CassandraCRUD(contact_points=['localhost'], keyspace='test_keyspace', connections_per_host=4)
+        CassandraCRUD(contact_points=['localhost'], keyspace='test_keyspace', protocol_version=2, pool_size=8).connect()
+        mock_cluster.return_value.set_max_connections_per_host.assert_called_with(HostDistance.LOCAL, 8)
+        mock_cluster.return_value.set_core_connections_per_host.assert_called_with(HostDistance.LOCAL, 2)
+        CassandraCRUD(contact_points=['localhost'], keyspace='test_keyspace', protocol_version=2, connections_per_host=4).connect()
+        mock_cluster.return_value.set_core_connections_per_host.assert_called_with(HostDistance.LOCAL, 4)
+
+    @patch('cassandracrud.core.Cluster')
+    def test_compression(self, mock_cluster):
+        CassandraCRUD(contact_points=['localhost'], keyspace='test_keyspace').connect()
+        self.assertIs(mock_cluster.call_args.kwargs["compression"], False)
+        CassandraCRUD(contact_points=['10.0.0.1'], keyspace='test_keyspace').connect()
+        self.assertIs(mock_cluster.call_args.kwargs["compression"], True)
+        CassandraCRUD(contact_points=['localhost'], keyspace='test_keyspace', compression='lz4').connect()
+        self.assertEqual(mock_cluster.call_args.kwargs["compression"], 'lz4')
+
+    def test_is_connected_skips_pandas(self):
+        self.crud.session.execute = MagicMock()
+        self.assertTrue(self.crud.is_connected())
+        self.crud.session.execution_profile_clone_update.assert_called_once_with(EXEC_PROFILE_DEFAULT, row_factory=tuple_factory)
+        self.crud.session.execute.assert_called_once_with(
+            "SELECT now() FROM system.local", execution_profile=self.crud.session.execution_profile_clone_update.return_value)
+
     def test_execute(self):
         mock_result = MagicMock()
         self.crud.session.execute = MagicMock(return_value=mock_result)
         result = self.crud.execute("SELECT * FROM test_table")
         self.assertEqual(result, mock_result)
+        self.crud.session.execute.assert_called_with("SELECT * FROM test_table")
+
+    def test_execute_builds_dataframe(self):
+        future = MagicMock(_col_names=["id", "name"], has_more_pages=False)
+        self.crud.session.execute = MagicMock(return_value=ResultSet(future, [(1, "John"), (2, "Jane")]))
+        result = self.crud.execute("SELECT * FROM test_table")
+        self.assertEqual(list(result.columns), ["id", "name"])
+        self.assertEqual(result["name"].tolist(), ["John", "Jane"])
+
+    def test_execute_concatenates_pages(self):
+        pages = [pandas_factory(["id"], [(1,), (2,)]), pandas_factory(["id"], [(3,)])]
+        future = MagicMock(_col_names=["id"])
+        type(future).has_more_pages = PropertyMock(side_effect=[True, False])
+        future.result.return_value = ResultSet(future, pages[1])
+        self.crud.session.execute = MagicMock(return_value=ResultSet(future, pages[0]))
+        result = self.crud.execute("SELECT id FROM test_table", fetch_size=2)
+        self.assertEqual(result["id"].tolist(), [1, 2, 3])
+        future.start_fetching_next_page.assert_called_once_with()
+        self.assertEqual(self.crud.session.execute.call_args.args[0].fetch_size, 2)
+
+    def test_execute_prefetches_tuple_pages(self):
+        future = MagicMock(_col_names=["id"])
+        type(future).has_more_pages = PropertyMock(side_effect=[True, False])
+        future.result.return_value = ResultSet(future, [(3,)])
+        self.crud.session.execute = MagicMock(return_value=ResultSet(future, [(1,), (2,)]))
+        calls = []
+        future.start_fetching_next_page.side_effect = lambda: calls.append("fetch")
+        convert = lambda rows, columns: calls.append("convert") or pd.DataFrame(rows, columns=columns)
+        with patch.object(pd.DataFrame, "from_records", side_effect=convert):
+            result = self.crud.execute("SELECT id FROM test_table")
+        self.assertEqual(result["id"].tolist(), [1, 2, 3])
+        self.assertEqual(calls, ["fetch", "convert", "convert"])
+
+    @patch('cassandracrud.core.execute_concurrent_with_args')
+    def test_create_dataframe(self, mock_execute_concurrent):
+        prepared = MagicMock()
+        self.crud.session.prepare = MagicMock(return_value=prepared)
+        data = pd.DataFrame({"id": [1, 2], "name": ["John", "Jane"]})
+        self.crud.create("test_table", data)
+        self.crud.session.prepare.assert_called_once_with("INSERT INTO test_table (id, name) VALUES (?, ?)")
+        args, kwargs = mock_execute_concurrent.call_args
+        self.assertEqual(args[:2], (self.crud.session, prepared))
+        self.assertEqual(list(args[2]), [(1, "John"), (2, "Jane")])
+        self.assertEqual(kwargs, {"concurrency": 256})
+
+    @patch('cassandracrud.core.execute_concurrent')
+    def test_create_dataframe_batched_by_partition(self, mock_execute_concurrent):
+        self.crud.session.prepare = MagicMock(return_value=MagicMock())
+        user_id = MagicMock()
+        user_id.name = "user_id"
+        table = MagicMock(partition_key=[user_id])
+        self.crud.cluster.metadata.keyspaces = {"test_keyspace": MagicMock(tables={"events": table})}
+        data = pd.DataFrame({"user_id": [1, 2, 1], "seq": [1, 1, 2]})
+        self.crud.create("events", data, same_partition=True)
+        batches = [batch for batch, _ in mock_execute_concurrent.call_args.args[1]]
+        self.assertEqual([len(batch) for batch in batches], [2, 1])
+        self.assertTrue(all(batch.batch_type == BatchType.UNLOGGED for batch in batches))
+
+        self.crud.create("events", data, same_partition=True, batch_size=1)
+        batches = [batch for batch, _ in mock_execute_concurrent.call_args.args[1]]
+        self.assertEqual([len(batch) for batch in batches], [1, 1, 1])
+
+    def test_create_dataframe_batched_requires_partition_key(self):
+        self.crud.session.prepare = MagicMock(return_value=MagicMock())
+        self.crud.cluster.metadata.keyspaces = {}
+        data = pd.DataFrame({"user_id": [1, 2], "seq": [1, 1]})
+        with self.assertRaises(ValueError):
+            self.crud.create("events", data, same_partition=True)
+
+    def test_prepared_statements_are_cached(self):
+        prepared = MagicMock()
+        self.crud.session.prepare = MagicMock(return_value=prepared)
+        self.crud.read("test_table", {"name": "John", "id": 1})
+        self.crud.read("test_table", {"id": 2, "name": "Jane"})
+        self.crud.session.prepare.assert_called_once_with("SELECT * FROM test_table WHERE id = ? AND name = ?")
+        self.crud.session.execute.assert_called_with(prepared, [2, "Jane"])
+
+    def test_read_binds_in_clause(self):
+        prepared = MagicMock()
+        self.crud.session.prepare = MagicMock(return_value=prepared)
+        self.crud.read("test_table", {"id": [1, 2, 3]})
+        self.crud.session.prepare.assert_called_once_with("SELECT * FROM test_table WHERE id IN ?")
+        self.crud.session.execute.assert_called_with(prepared, [[1, 2, 3]])
+        self.crud.read("test_table", {"point": (1, 2)})
+        self.crud.session.prepare.assert_called_with("SELECT * FROM test_table WHERE point = ?")
+        self.crud.session.execute.assert_called_with(prepared, [(1, 2)])
+
+    def test_prepare_returns_unshared_statement(self):
+        self.crud.session.prepare = MagicMock(side_effect=lambda query: MagicMock())
+        self.crud.read("test_table", {"id": 1})
+        prepared = self.crud.prepare("SELECT * FROM test_table WHERE id = ?")
+        self.assertIsNot(prepared, self.crud._stmt_cache["SELECT * FROM test_table WHERE id = ?"])
+
+    def test_update_skips_dataframe(self):
+        prepared = MagicMock()
+        self.crud.session.prepare = MagicMock(return_value=prepared)
+        result = self.crud.update("test_table", {"name": "Jane"}, {"id": 1})
+        self.assertIsNone(result)
+        self.crud.session.prepare.assert_called_once_with("UPDATE test_table SET name = ? WHERE id = ?")
+        prepared.bind.assert_called_once_with(["Jane", 1])
+        self.crud.session.execute.assert_called_with(prepared.bind.return_value)
+
+    def test_write_bind_errors_propagate(self):
+        prepared = MagicMock()
+        prepared.bind.side_effect = TypeError("expected datetime")
+        self.crud.session.prepare = MagicMock(return_value=prepared)
+        with self.assertRaises(TypeError):
+            self.crud.create("test_table", {"ts": "2024-01-01 00:00:00"})
+
+    def test_table_schema_from_metadata(self):
+        id_column = MagicMock(cql_type="int")
+        id_column.name = "id"
+        table = MagicMock(columns={"id": id_column})
+        self.crud.cluster.metadata.keyspaces = {"test_keyspace": MagicMock(tables={"test_table": table})}
+        self.assertTrue(self.crud.table_exists("test_table"))
+        self.assertFalse(self.crud.table_exists("missing_table"))
+        schema = self.crud.get_table_schema("test_table")
+        self.assertEqual(schema.to_dict("records"), [{"column_name": "id", "type": "int"}])
+
+    def test_schema_metadata_refreshed_after_ddl(self):
+        self.assertFalse(self.crud.cluster.schema_metadata_enabled)
+        self.crud.session.execute = MagicMock()
+        self.crud.create_table("test_table", {"id": "int PRIMARY KEY"})
+        self.crud.cluster.refresh_table_metadata.assert_called_once_with("test_keyspace", "test_table")
+
+    def test_table_metadata_refreshed_on_miss(self):
+        keyspace = MagicMock(tables={})
+        self.crud.cluster.metadata.keyspaces = {"other_keyspace": keyspace}
+        self.crud.cluster.refresh_table_metadata.side_effect = lambda ks, table: keyspace.tables.update({table: MagicMock()})
+        self.assertTrue(self.crud.table_exists("other_keyspace.new_table"))
+        self.crud.cluster.refresh_table_metadata.assert_called_once_with("other_keyspace", "new_table")
+
+        self.crud.refresh_schema_metadata = True
+        self.assertFalse(self.crud.table_exists("other_keyspace.missing_table"))
+        self.crud.cluster.refresh_table_metadata.assert_called_once_with("other_keyspace", "new_table")
+
+    def test_schema_refresh_errors_are_reported(self):
+        self.crud.session.execute = MagicMock()
+        self.crud.cluster.metadata.keyspaces = {}
+        self.crud.cluster.refresh_table_metadata.side_effect = Exception("no agreement")
+        self.crud.drop_table("test_table")
+        self.assertFalse(self.crud.table_exists("test_table"))
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file